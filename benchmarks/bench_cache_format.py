@@ -0,0 +1,60 @@
+"""Benchmark: load time, write time and on-disk size of plain and compressed cache files"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bucket import cache
+
+WORDS = ["quick", "fast", "rapid", "swift", "speedy", "hasty", "brisk", "fleet", "nimble", "prompt",
+         "slow", "sluggish", "leisurely", "unhurried", "plodding", "happy", "glad", "cheerful", "joyful"]
+
+def make_cache(entries: int) -> dict:
+    """A cache shaped like real thesaurus results"""
+    rng = random.Random(entries)
+    data = {}
+    for i in range(entries):
+        word = {}
+        for sense in range(rng.randint(1, 4)):
+            word[f"{rng.choice(WORDS)} {sense}"] = {
+                "def": " ".join(rng.choices(WORDS, k=8)),
+                "syn": rng.choices(WORDS, k=rng.randint(3, 30)),
+                "ant": rng.choices(WORDS, k=rng.randint(0, 10)),
+            }
+        word["__valid"] = 1700000000 + i
+        data[f"word{i}"] = word
+    return data
+
+def timed(func, repeat: int) -> float:
+    """Best seconds per call"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main() -> None:
+    """Main func"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'format':<11}{'write (ms)':>12}{'load (ms)':>12}{'size (KB)':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "cache.json")
+        for size in args.sizes:
+            data = make_cache(size)
+            for compress in (False, True):
+                write = timed(lambda: cache.dump(data, filename, compress), args.repeat)
+                load = timed(lambda: cache.load(filename), args.repeat)
+                name = "compressed" if compress else "plain"
+                print(f"{size:>8} {name:<11}{write * 1000:>12.1f}{load * 1000:>12.1f}"
+                      f"{os.path.getsize(filename) / 1000:>12.1f}")
+
+if __name__ == "__main__":
+    main()
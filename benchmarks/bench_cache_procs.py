@@ -0,0 +1,78 @@
+"""Stress: several processes writing one cache file, checks for lost updates and measures throughput.
+   The journal limit is kept small so folding the journal into the cache file races with appends"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bucket.cache import Cache
+
+SENSE = {"as in example": {"def": "an example definition", "syn": ["sample", "specimen", "case"],
+                           "ant": ["exception"]}}
+
+def writer(filename: str, shared: bool, journal_limit: int, worker: int, writes: int, start) -> None:
+    """Save a run of unique keys, writing to disk after each one"""
+    cache = Cache(filename, shared=shared)
+    cache.journal_limit = journal_limit
+    start.wait()
+    for i in range(writes):
+        cache.save(f"w{worker}-{i}", json.loads(json.dumps(SENSE)))
+
+def run(filename: str, shared: bool, journal_limit: int, workers: int, writes: int) -> tuple[int, float]:
+    """Returns (entries lost, writes per second)"""
+    for leftover in (filename, f"{filename}.journal"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    Cache(filename, shared=shared)
+
+    start = multiprocessing.Event()
+    processes = [multiprocessing.Process(target=writer, args=(filename, shared, journal_limit,
+                                                                    worker, writes, start))
+                 for worker in range(workers)]
+    for process in processes:
+        process.start()
+    began = time.perf_counter()
+    start.set()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - began
+
+    # Count through the cache so entries still in the journal are included
+    found = len(Cache(filename).cache)
+    return workers * writes - found, workers * writes / elapsed
+
+def main() -> None:
+    """Main func"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=200, help="writes per worker")
+    parser.add_argument("--journal-limit", type=int, default=2000,
+                        help="journal bytes before it is folded into the cache file")
+    args = parser.parse_args()
+
+    lost = {}
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "cache.json")
+        for shared in (False, True):
+            lost[shared], rate = run(filename, shared, args.journal_limit, args.workers, args.writes)
+            mode = "shared" if shared else "unshared"
+            print(f"{mode:<9}{args.workers} workers x {args.writes} writes: "
+                  f"{lost[shared]} lost, {rate:.0f} writes/s")
+
+    failed = False
+    if lost[True] > 0:
+        print("FAIL: shared mode lost entries")
+        failed = True
+    if lost[False] == 0:
+        # Without a visible race in unshared mode, a clean shared run proves nothing
+        print("FAIL: unshared mode lost nothing, raise --workers/--writes or lower --journal-limit")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark: idle CPU of the render loop per window state, and hotkey wakeup latency"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# The app loads its config, cache and assets relative to the working directory
+os.chdir(ROOT)
+import dearpygui.dearpygui as dpg
+import win32con
+import win32gui
+import quickthesaurus as qt
+import bucket.win32 as w32
+
+def cpu_percent(duration: float) -> float:
+    """CPU used by this process over the duration, as a percentage of one core"""
+    wall, cpu = time.perf_counter(), time.process_time()
+    time.sleep(duration)
+    return (time.process_time() - cpu) / (time.perf_counter() - wall) * 100
+
+def wakeup_latency(samples: int) -> list[float]:
+    """Seconds from the hotkey callback firing to the render loop toggling the window"""
+    toggled = threading.Event()
+    window_toggle = qt.window_toggle
+
+    def timed_toggle() -> None:
+        window_toggle()
+        toggled.set()
+
+    qt.window_toggle = timed_toggle
+    latencies = []
+    for _ in range(samples):
+        toggled.clear()
+        start = time.perf_counter()
+        qt.request_toggle()
+        toggled.wait(5)
+        latencies.append(time.perf_counter() - start)
+        # Let the loop settle back into its idle state before the next sample
+        time.sleep(1)
+    qt.window_toggle = window_toggle
+    return latencies
+
+def measure(args, results: dict) -> None:
+    """Runs alongside the render loop and records each measurement"""
+    try:
+        hwnd = w32.find_window(qt.Global.appname)
+        time.sleep(args.warmup)
+        results["foreground"] = cpu_percent(args.duration)
+
+        # Hand focus to the desktop so the app is visible but in the background
+        win32gui.SetForegroundWindow(win32gui.GetDesktopWindow())
+        time.sleep(args.warmup)
+        results["background"] = cpu_percent(args.duration)
+
+        win32gui.ShowWindow(hwnd, win32con.SW_MINIMIZE)
+        time.sleep(args.warmup)
+        results["minimized"] = cpu_percent(args.duration)
+
+        # Each sample restores or minimizes, starting from minimized
+        results["wakeup"] = wakeup_latency(args.samples)
+    finally:
+        dpg.stop_dearpygui()
+
+def main() -> None:
+    """Main func"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to measure each state")
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--samples", type=int, default=10, help="wakeup latency samples")
+    args = parser.parse_args()
+
+    results = {}
+    qt.setup()
+    threading.Thread(target=measure, args=(args, results), daemon=True).start()
+    qt.render_loop()
+    dpg.destroy_context()
+
+    for state in ("foreground", "background", "minimized"):
+        print(f"idle cpu {state:<11}{results.get(state, float('nan')):>8.2f} %")
+    if results.get("wakeup"):
+        wakeup = results["wakeup"]
+        print(f"wakeup latency   median {statistics.median(wakeup) * 1000:.2f} ms, "
+              f"max {max(wakeup) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
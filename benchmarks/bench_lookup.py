@@ -0,0 +1,72 @@
+"""Benchmark: time-to-first-sense and total lookup time, full page vs streaming"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import mw_parser
+from mw_parser import SynAnt
+
+def time_full(word: str) -> tuple[float, float] | None:
+    """Full download then parse, the first sense is only available at the end.
+       Returns None if the lookup found nothing"""
+    start = time.perf_counter()
+    thesaurus = SynAnt(word).get_thesaurus()
+    total = time.perf_counter() - start
+    if not thesaurus:
+        return None
+    return total, total
+
+def time_stream(word: str, chunk_size: int) -> tuple[float, float] | None:
+    """Streaming download, returns (time to first sense, total time), or None if it found nothing"""
+    start = time.perf_counter()
+    first = None
+    for _ in SynAnt.stream(word, chunk_size):
+        if first is None:
+            first = time.perf_counter() - start
+    total = time.perf_counter() - start
+    if first is None:
+        return None
+    return first, total
+
+def main() -> None:
+    """Main func"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("words", nargs="*", default=["quick", "happy", "run", "light", "set"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=16384)
+    parser.add_argument("--url", default=mw_parser.URL,
+                        help="url template with {} for the word, e.g. file:///path/page.html#{}")
+    args = parser.parse_args()
+    mw_parser.URL = args.url
+
+    results = {"full": ([], []), "stream": ([], [])}
+    # Lookups that found no senses are counted, not timed, so a failed lookup can't pass as a fast one
+    empty = {"full": 0, "stream": 0}
+    for _ in range(args.repeat):
+        for word in args.words:
+            for mode, timer in (("full", time_full),
+                                ("stream", lambda w: time_stream(w, args.chunk_size))):
+                timing = timer(word)
+                if timing is None:
+                    empty[mode] += 1
+                    continue
+                results[mode][0].append(timing[0])
+                results[mode][1].append(timing[1])
+
+    print(f"{'mode':<8}{'first sense (ms)':>20}{'total (ms)':>14}{'empty':>8}")
+    for mode, (firsts, totals) in results.items():
+        if not firsts:
+            print(f"{mode:<8}{'-':>20}{'-':>14}{empty[mode]:>8}")
+            continue
+        print(f"{mode:<8}{statistics.median(firsts) * 1000:>20.1f}"
+              f"{statistics.median(totals) * 1000:>14.1f}{empty[mode]:>8}")
+
+    if any(empty.values()):
+        print(f"{sum(empty.values())} lookups found no senses, check the words and --url")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Benchmark: cost of refreshing the settings panel's cache statistics, and of a burst of config saves"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bucket.cache import Cache
+from bucket.config import Config
+
+def rescan_count(cache: Cache) -> tuple[int, int]:
+    """The old full scan, checking every entry against the clock"""
+    total = 0
+    invalid = 0
+    for key in cache.cache:
+        total += 1
+        if not cache.check(key):
+            invalid += 1
+    return total, invalid
+
+def timed(func, repeat: int) -> float:
+    """Median milliseconds per call"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2] * 1000
+
+def main() -> None:
+    """Main func"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = Cache(os.path.join(directory, "cache.json"), shared=False)
+        for i in range(args.entries):
+            cache.save(f"word{i}", {"as in word": {"syn": [], "ant": []}}, save_to_disk=False)
+        cache.write()
+        cache.invalidate("word0")
+
+        print(f"cache of {args.entries} entries")
+        print(f"  count() rescan     {timed(lambda: rescan_count(cache), args.repeat):>9.3f} ms")
+        print(f"  count() tracked    {timed(cache.count, args.repeat):>9.3f} ms")
+        print(f"  size()             {timed(cache.size, args.repeat):>9.3f} ms")
+
+        config = Config(os.path.join(directory, "config.json"))
+        config.flush()
+        saves = lambda: [config.save(key, value) for key, value in config.default_config.items()]
+        print(f"  config save burst  {timed(saves, args.repeat):>9.3f} ms")
+        print(f"  config flush       {timed(lambda: (config.write(), config.flush()), args.repeat):>9.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Thesaurus Backends"""
+import json
+import mmap
+import struct
+from typing import Iterable, Iterator
+from mw_parser import SynAnt
+from bucket import cache, fileio
+
+class Backend:
+    """Base thesaurus backend, looks up a word and returns its thesaurus"""
+    name: str = "base"
+    # Remote backends are slow, their results are worth caching
+    remote: bool = False
+
+    def lookup(self, word: str) -> dict:
+        """Returns the thesaurus for a word, or an empty dict if it isn't found"""
+        raise NotImplementedError
+
+    def stream(self, word: str) -> Iterator[tuple[str, dict]]:
+        """Yields each ("as in" word, sense) pair of the thesaurus as it becomes available"""
+        yield from self.lookup(word).items()
+
+    def close(self) -> None:
+        """Release any resources held by the backend"""
+
+class NetworkBackend(Backend):
+    """Merriam-Webster backend, fetches every lookup over the network"""
+    name: str = "network"
+    remote: bool = True
+
+    def lookup(self, word: str) -> dict:
+        """Returns the thesaurus for a word from Merriam-Webster"""
+        return SynAnt(word).get_thesaurus()
+
+    def stream(self, word: str) -> Iterator[tuple[str, dict]]:
+        """Yields each sense while the Merriam-Webster page is still downloading"""
+        yield from SynAnt.stream(word)
+
+class LocalBackend(Backend):
+    """Offline backend, reads a prebuilt memory-mapped thesaurus pack"""
+    name: str = "local"
+
+    # Pack layout: header, sorted index of (key offset, key length, value offset, value length),
+    # then the utf-8 keys and json values the index points at
+    MAGIC: bytes = b"QTPK"
+    VERSION: int = 1
+    HEADER = struct.Struct("<4sII")
+    INDEX = struct.Struct("<IIII")
+
+    def __init__(self, filename: str = "thesaurus.pack") -> None:
+        self.filename = filename
+        self._file = None
+        self._mmap = None
+        self._count = 0
+        # Fingerprint of the mapped pack, to notice when it is rebuilt
+        self._stamp = None
+
+    def _open(self) -> bool:
+        """Map the pack into memory on first use, remapping it if it was rebuilt,
+           returns False if there is no usable pack"""
+        stamp = fileio.stamp(self.filename)
+        if self._mmap is not None:
+            if stamp == self._stamp:
+                return True
+            self.close()
+        if stamp is None:
+            return False
+
+        try:
+            self._stamp = stamp
+            self._file = open(self.filename, "rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self._count = self.HEADER.unpack_from(self._mmap, 0)
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError(f"{self.filename} is not a v{self.VERSION} thesaurus pack")
+            if self.HEADER.size + self._count * self.INDEX.size > len(self._mmap):
+                raise ValueError(f"{self.filename} is truncated")
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Failed to open thesaurus pack: {e}")
+            self.close()
+            return False
+        return True
+
+    def _entry(self, i: int) -> tuple[int, int, int, int]:
+        """Returns the index entry at position i"""
+        return self.INDEX.unpack_from(self._mmap, self.HEADER.size + i * self.INDEX.size)
+
+    def lookup(self, word: str) -> dict:
+        """Binary search the pack index for the word"""
+        if not self._open():
+            return {}
+
+        key = word.encode("UTF-8")
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            key_off, key_len, val_off, val_len = self._entry(mid)
+            current = self._mmap[key_off:key_off + key_len]
+            if current == key:
+                return json.loads(self._mmap[val_off:val_off + val_len])
+            if current < key:
+                low = mid + 1
+            else:
+                high = mid
+        return {}
+
+    def count(self) -> int:
+        """Returns the number of words in the pack"""
+        if not self._open():
+            return 0
+        return self._count
+
+    def close(self) -> None:
+        """Unmap and close the pack"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._count = 0
+        self._stamp = None
+
+def build_pack(entries: Iterable[tuple[str, dict]], filename: str = "thesaurus.pack") -> int:
+    """Write (word, thesaurus) pairs to a pack file, returns the number of words written"""
+    encoded = {}
+    for word, thesaurus in entries:
+        if not thesaurus:
+            continue
+        # Cache exports carry their validity timestamp, which means nothing inside a pack
+        thesaurus = {key: value for key, value in thesaurus.items() if key != "__valid"}
+        encoded[word.encode("UTF-8")] = json.dumps(thesaurus, separators=(",", ":")).encode("UTF-8")
+
+    keys = sorted(encoded)
+    offset = LocalBackend.HEADER.size + len(keys) * LocalBackend.INDEX.size
+    index = bytearray()
+    for key in keys:
+        value = encoded[key]
+        index += LocalBackend.INDEX.pack(offset, len(key), offset + len(key), len(value))
+        offset += len(key) + len(value)
+
+    # Written atomically so a running LocalBackend never maps a half-written pack, it remaps on its
+    # next lookup. Windows can't replace a file another process has mapped, so close the app first there
+    with fileio.atomic_write(filename, "wb") as file:
+        file.write(LocalBackend.HEADER.pack(LocalBackend.MAGIC, LocalBackend.VERSION, len(keys)))
+        file.write(index)
+        for key in keys:
+            file.write(key)
+            file.write(encoded[key])
+
+    return len(keys)
+
+def entries_from_cache(filename: str = "cache.json") -> Iterator[tuple[str, dict]]:
+    """Yields (word, thesaurus) pairs from a cache export"""
+    yield from cache.load_export(filename).items()
+
+def entries_from_wordlist(words: Iterable[str], backend: Backend) -> Iterator[tuple[str, dict]]:
+    """Yields (word, thesaurus) pairs by looking up each word in a word list with a backend,
+       skipping words whose lookup fails so one bad page doesn't lose the rest"""
+    for word in words:
+        word = word.strip().lower()
+        if not word:
+            continue
+        try:
+            thesaurus = backend.lookup(word)
+        except Exception as e:
+            print(f"Skipping '{word}', lookup failed: {e}")
+            continue
+        yield word, thesaurus
+
+def from_config(order: list[str], pack_file: str) -> list[Backend]:
+    """Build the backend resolution order from the config"""
+    backends = []
+    for name in order:
+        match name:
+            case "local":
+                backends.append(LocalBackend(pack_file))
+            case "network":
+                backends.append(NetworkBackend())
+            case _:
+                print(f"Unknown thesaurus backend, {name}")
+    return backends
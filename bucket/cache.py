@@ -1,24 +1,188 @@
 """Cache Handler"""
+import gzip
+import io
 import json
-import os
 import time
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager, nullcontext
+from typing import Iterator
+from bucket import fileio
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+def is_compressed(filename: str) -> bool:
+    """Check if a cache file is gzip compressed"""
+    with open(filename, "rb") as file:
+        return file.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+
+def load(filename: str) -> dict:
+    """Load a cache file, detecting whether it is plain or gzip compressed json"""
+    if is_compressed(filename):
+        with gzip.open(filename, "rt", encoding="UTF-8") as file:
+            return json.load(file)
+    with open(filename, "r", encoding="UTF-8") as file:
+        return json.load(file)
+
+def read_journal(journal: str, offset: int = 0) -> tuple[list[tuple[str, dict]], int]:
+    """Returns the journal entries past offset, and the offset just after the last whole line"""
+    try:
+        with open(journal, "rb") as file:
+            file.seek(offset)
+            data = file.read()
+    except FileNotFoundError:
+        return [], offset
+
+    # Only whole lines, in case an unlocked writer is part way through one
+    end = data.rfind(b"\n") + 1
+    entries = []
+    for line in data[:end].splitlines():
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            # Without the lock, unshared writers can interleave lines, there's nothing to recover
+            continue
+        entries.append((entry["key"], entry["value"]))
+    return entries, offset + end
+
+def load_export(filename: str) -> dict:
+    """Load a cache file with its journal applied, read-only, without locking or migrating it"""
+    cache = load(filename)
+    entries, _ = read_journal(f"{filename}.journal")
+    cache.update(entries)
+    return cache
+
+def dump(cache: dict, filename: str, compress: bool = False) -> None:
+    """Atomically write a cache file, encoding straight into the file rather than building a string first"""
+    if not compress:
+        with fileio.atomic_write(filename) as file:
+            json.dump(cache, file)#, indent=4)
+        return
+
+    with fileio.atomic_write(filename, "wb") as file:
+        # Closing the wrapper finishes the gzip stream, but leaves the underlying file open
+        with io.TextIOWrapper(gzip.GzipFile(fileobj=file, mode="wb", compresslevel=6, mtime=0),
+                              encoding="UTF-8") as text:
+            json.dump(cache, text)
 
 class Cache:
     """Cache Handler"""
-    def __init__(self, filename: str = "cache.json", ttl: int = 604800) -> None:
+    def __init__(self, filename: str = "cache.json", ttl: int = 604800, shared: bool = True,
+                 compress: bool = False) -> None:
         self.filename = filename
+        # Compressed caches are gzipped json, either format is read and the file migrates on the next write
+        self.compress = compress
 
         # TTL is currently set to 1 week, although I'm not sure what would be a better value
         self.ttl = ttl
 
+        # In shared mode, other processes may write the same cache file, so every write
+        # happens under a file lock and merges with whatever they wrote in the meantime
+        self.shared = shared
+        # Saved entries are appended to a journal of json lines instead of rewriting the whole cache,
+        # once the journal outgrows the cache file (or journal_limit) it's folded back in
+        self.journal = f"{filename}.journal"
+        self.journal_limit = 1000000
+        # Keys saved locally that haven't been written to disk yet
+        self._dirty: set[str] = set()
+        # Fingerprint of the file as of the last time it was read or written
+        self._stamp = None
+        # How far into the journal has been applied, doubling as a change counter for other processes' saves
+        self._offset = 0
+        # Sorted "__valid" timestamps of every entry, so counting invalid entries is a bisect, not a scan
+        self._expiries: list[int] = []
+
         self.cache = {}
-        # If the cache already exists, pull it, otherwise create it
-        if os.path.exists(self.filename):
-            with open(self.filename, "r", encoding="UTF-8") as file:
-                self.cache = json.load(file)
-        else:
-            with open(self.filename, "w", encoding="UTF-8") as file:
-                file.write("{}")
+        # If the cache already exists, pull it, otherwise create it, rewriting it if it's in the other format
+        with self._lock():
+            self._reload()
+            if self._stamp is None or is_compressed(self.filename) != self.compress:
+                self._write()
+
+    def _lock(self):
+        """File lock in shared mode, otherwise nothing"""
+        if self.shared:
+            return fileio.lock(self.filename)
+        return nullcontext()
+
+    def _journal_size(self) -> int:
+        """Returns the size of the journal in bytes"""
+        stamp = fileio.stamp(self.journal)
+        return stamp[2] if stamp is not None else 0
+
+    def _reload(self) -> None:
+        """Catch up with other processes, keeping unwritten local entries on top. A rewritten cache
+           file is loaded in full, otherwise only journal entries added since the last look are applied"""
+        stamp = fileio.stamp(self.filename)
+        if stamp is None:
+            return
+
+        journal = self._journal_size()
+        # A journal shorter than what was applied has been folded into a rewritten cache file
+        if stamp != self._stamp or journal < self._offset:
+            disk = load(self.filename)
+            for key in self._dirty:
+                if key in self.cache:
+                    disk[key] = self.cache[key]
+            self.cache = disk
+            self._stamp = stamp
+            self._offset = 0
+            self._replay(track=False)
+            self._expiries = sorted(entry["__valid"] for entry in self.cache.values())
+        elif journal != self._offset:
+            self._replay(track=True)
+
+    def _replay(self, track: bool) -> None:
+        """Apply the journal entries past the current offset"""
+        entries, self._offset = read_journal(self.journal, self._offset)
+        for key, value in entries:
+            if key in self._dirty:
+                continue
+            if track:
+                self._track(self.cache[key]["__valid"] if key in self.cache else None, value["__valid"])
+            self.cache[key] = value
+
+    def _track(self, old: int | None, new: int | None) -> None:
+        """Move an entry's expiry in the sorted expiry list"""
+        if old is not None:
+            del self._expiries[bisect_left(self._expiries, old)]
+        if new is not None:
+            insort(self._expiries, new)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Lock, bring the cache up to date, apply the changes made in the block and write it out"""
+        with self._lock():
+            self._reload()
+            yield
+            self._write()
+
+    def _write(self) -> None:
+        """Write the whole cache out and empty the journal, the lock must already be held in shared mode"""
+        dump(self.cache, self.filename, self.compress)
+        with open(self.journal, "wb"):
+            pass
+        self._stamp = fileio.stamp(self.filename)
+        self._offset = 0
+        self._dirty.clear()
+
+    def _append(self) -> None:
+        """Append the unwritten entries to the journal, the lock must already be held in shared mode"""
+        with open(self.journal, "ab") as file:
+            for key in self._dirty:
+                if key in self.cache:
+                    line = json.dumps({"key": key, "value": self.cache[key]}, separators=(",", ":"))
+                    file.write(line.encode("UTF-8") + b"\n")
+            self._offset = file.tell()
+        self._dirty.clear()
+
+    def refresh(self) -> None:
+        """Pick up entries written by other processes, this is only a couple of stats if nothing changed"""
+        if not self.shared:
+            return
+        if fileio.stamp(self.filename) == self._stamp and self._journal_size() == self._offset:
+            return
+        with self._lock():
+            self._reload()
 
     def update_ttl(self, ttl: int) -> None:
         """Set TTL for cache entries"""
@@ -34,61 +198,78 @@ class Cache:
         return False
     def get(self, key: str) -> dict | None:
         """Get the key from the cache"""
+        if not self.check(key):
+            # Another process may have cached it since we last looked
+            self.refresh()
         if self.check(key):
             return self.cache[key]
         return None
     def save(self, key: str, value, save_to_disk=True) -> None:
         """Save a cache value, optionally writing to disk"""
+        old = self.cache[key]["__valid"] if key in self.cache else None
         self.cache[key] = value
         self.cache[key]["__valid"] = int(time.time()) + self.ttl
+        self._track(old, self.cache[key]["__valid"])
+        self._dirty.add(key)
         if save_to_disk:
             self.write()
     def write(self) -> None:
-        """Write the data to cache, adding a ttl value"""
-        with open(self.filename, "w", encoding="UTF-8") as file:
-            json.dump(self.cache, file)#, indent=4)
+        """Write the unwritten entries to the journal, folding it into the cache file once it grows too big"""
+        with self._lock():
+            self._reload()
+            self._append()
+            if self._offset > max(self.journal_limit, self._stamp[2]):
+                self._write()
     def purge(self, invalid_only=False) -> None:
         """Purge cache, optionally only discard invalid entries"""
-        newcache = self.cache.copy()
-        if invalid_only:
-            # Loop over each key, and if check returns False, we know it's invalid, so delete it
-            for key in self.cache:
-                if not self.check(key):
-                    del newcache[key]
-            self.cache = newcache
-        else:
-            # Otherwise just clear the whole list
-            self.cache = {}
-
-        self.write()
+        with self._transaction():
+            if invalid_only:
+                # Keep only the entries that are still valid, the invalid ones are at the front of the expiries
+                now = int(time.time())
+                self.cache = {key: value for key, value in self.cache.items() if now < value["__valid"]}
+                del self._expiries[:bisect_right(self._expiries, now)]
+            else:
+                # Otherwise just clear the whole list
+                self.cache = {}
+                self._expiries = []
 
     # Cache Validation #
     def invalidate(self, key: str) -> None:
         """Invalidate cache for a specific entry"""
+        self.refresh()
         if key in self.cache:
+            self._track(self.cache[key]["__valid"], 0)
             self.cache[key]["__valid"] = 0
+            self._dirty.add(key)
             self.write()
     def invalidate_all(self) -> None:
         """Invalidate cache for all entries"""
-        for key in self.cache:
-            self.cache[key]["__valid"] = 0
-        self.write()
+        with self._transaction():
+            for key in self.cache:
+                self.cache[key]["__valid"] = 0
+            self._expiries = [0] * len(self.cache)
     def revalidate(self, key: str) -> None:
         """Revalidate cache for a specific entry"""
+        self.refresh()
         if key in self.cache:
-            self.cache[key]["__valid"] = int(time.time()) + self.ttl
+            valid = int(time.time()) + self.ttl
+            self._track(self.cache[key]["__valid"], valid)
+            self.cache[key]["__valid"] = valid
+            self._dirty.add(key)
             self.write()
     def revalidate_all(self) -> None:
         """Revalidate cache for all entries"""
-        for key in self.cache:
-            self.cache[key]["__valid"] = int(time.time()) + self.ttl
-        self.write()
+        with self._transaction():
+            valid = int(time.time()) + self.ttl
+            for key in self.cache:
+                self.cache[key]["__valid"] = valid
+            self._expiries = [valid] * len(self.cache)
 
     # Cache Information #
     def size(self) -> str:
-        """Returns the size of the cache file"""
+        """Returns the size of the cache file and its journal as of the last read or write"""
         output = ""
-        size = os.path.getsize(self.filename)
+        size = (self._stamp[2] if self._stamp is not None else 0) + self._offset
         if size >= 1000000:
             output = f"{size/1000000} MB"
         elif size >= 1000:
@@ -99,11 +280,7 @@ class Cache:
         return output
     def count(self) -> tuple[int, int]:
         """Returns total count, and invalid count of entries."""
-        total = 0
-        invalid = 0
-        for key in self.cache:
-            total += 1
-            if not self.check(key):
-                invalid += 1
+        total = len(self.cache)
+        invalid = bisect_right(self._expiries, int(time.time()))
 
         return total, invalid
@@ -1,6 +1,10 @@
 """Configuration R/W"""
+import atexit
 import json
 import os
+import threading
+import time
+from bucket import fileio
 
 class Config:
     """Configuration Handler"""
@@ -15,18 +19,32 @@ class Config:
         "show_synonyms": True,
         "show_antonyms": True,
         "column_count": 3,
-        "ttl": 604800
+        "ttl": 604800,
+        "backends": ["local", "network"],
+        "pack_file": "thesaurus.pack",
+        "shared_cache": True,
+        "compress_cache": False
     }
 
-    def __init__(self, filename: str = "config.json") -> None:
+    def __init__(self, filename: str = "config.json", delay: float = 1.0) -> None:
         self.filename = filename
+
+        # Writes are held back for delay seconds, so a burst of saves becomes one write
+        self.delay = delay
+        self._timer: threading.Timer | None = None
+        self._deadline = 0.0
+        self._dirty = False
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
         if os.path.exists(self.filename):
             with open(self.filename, "r", encoding="UTF-8") as file:
                 self.config = json.load(file)
             self.validate_keys()
         else:
-            with open(self.filename, "w", encoding="UTF-8") as file:
-                json.dump(self.default_config, file, indent=4)
+            self.config = self.default_config.copy()
+            self.write()
+            self.flush()
 
     def validate_keys(self) -> None:
         """Validates all default keys exist in the config, adding them if not"""
@@ -37,9 +55,9 @@ class Config:
 
     def set_default(self) -> None:
         """Reset config to default values"""
-        with open(self.filename, "w", encoding="UTF-8") as file:
-            json.dump(self.default_config, file, indent=4)
-        self.config = self.default_config.copy()
+        with self._lock:
+            self.config = self.default_config.copy()
+        self.write()
 
     def get_version(self) -> str:
         """Get config/cache version"""
@@ -68,10 +86,39 @@ class Config:
         return self.default_config[key]
     def save(self, key: str, value, save_to_disk=True) -> None:
         """Save a config value, optionally writing to disk"""
-        self.config[key] = value
+        with self._lock:
+            self.config[key] = value
         if save_to_disk:
             self.write()
     def write(self) -> None:
-        """Write the data to config"""
-        with open(self.filename, "w", encoding="UTF-8") as file:
-            json.dump(self.config, file, indent=4)
+        """Schedule the data to be written to config, pushing back the deadline if one is pending"""
+        with self._lock:
+            self._dirty = True
+            self._deadline = time.monotonic() + self.delay
+            if self._timer is None:
+                self._start_timer(self.delay)
+    def _start_timer(self, delay: float) -> None:
+        """Start the single pending write timer, the lock must already be held"""
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+    def _on_timer(self) -> None:
+        """Flush once the deadline has passed, otherwise wait out the rest of it"""
+        with self._lock:
+            remaining = self._deadline - time.monotonic()
+            if remaining > 0:
+                self._start_timer(remaining)
+                return
+            self._timer = None
+        self.flush()
+    def flush(self) -> None:
+        """Write any pending changes to config now"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            with fileio.atomic_write(self.filename) as file:
+                json.dump(self.config, file, indent=4)
+            self._dirty = False
@@ -0,0 +1,75 @@
+"""File locking and atomic writes"""
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+# The umask can only be read by setting it, which affects every thread, so read it once at import
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+@contextmanager
+def lock(filename: str) -> Iterator[None]:
+    """Hold an exclusive advisory lock for a file, shared between processes through filename.lock"""
+    with open(f"{filename}.lock", "a+b") as file:
+        if os.name == "nt":
+            # msvcrt locks from the current position and gives up after ~10 seconds, so keep trying
+            file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        else:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+@contextmanager
+def atomic_write(filename: str, mode: str = "w") -> Iterator[IO]:
+    """Write to a temporary file and swap it in on success, so readers never see a partial file"""
+    directory = os.path.dirname(os.path.abspath(filename))
+    encoding = None if "b" in mode else "UTF-8"
+    fd, temp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filename)}.", suffix=".tmp")
+    try:
+        # mkstemp makes the file owner-only, so give it the permissions a plain open() would have
+        os.chmod(temp, _mode(filename))
+        with os.fdopen(fd, mode, encoding=encoding) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp, filename)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+def _mode(filename: str) -> int:
+    """Permissions of the existing file, otherwise the default for a new file under the umask"""
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+def stamp(filename: str) -> tuple[int, int, int] | None:
+    """Returns a cheap fingerprint of a file that changes whenever it is replaced or rewritten"""
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    # Atomic writes give the file a new inode, which catches rewrites within the same mtime tick
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
@@ -4,22 +4,37 @@ import win32gui
 import win32con
 import win32api
 
+# Window handles are looked up every frame, so remember them once found
+_hwnds: dict[str, int] = {}
+
+def find_window(appname: str) -> int | None:
+    """Find the window handle for the app"""
+    hwnd = _hwnds.get(appname)
+    if hwnd and win32gui.IsWindow(hwnd):
+        return hwnd
+
+    hwnd = win32gui.FindWindow(None, appname)
+    if not hwnd:
+        # Fallback: try to find any top-level window that contains the appname in its title
+        def _enum(hwnd_enum, result):
+            title = win32gui.GetWindowText(hwnd_enum)
+            if title and appname in title:
+                result.append(hwnd_enum)
+        found = []
+        win32gui.EnumWindows(_enum, found)
+        if not found:
+            return None
+        hwnd = found[0]
+
+    _hwnds[appname] = hwnd
+    return hwnd
+
 def toggle_window(appname: str) -> str | None:
     """Thread-safe toggle using only win32 calls (safe to call from hotkey thread)"""
     try:
-        hwnd = win32gui.FindWindow(None, appname)
+        hwnd = find_window(appname)
         if not hwnd:
-            # Fallback: try to find any top-level window that contains the appname in its title
-            def _enum(hwnd_enum, result):
-                title = win32gui.GetWindowText(hwnd_enum)
-                if title and appname in title:
-                    result.append(hwnd_enum)
-            found = []
-            win32gui.EnumWindows(_enum, found)
-            if found:
-                hwnd = found[0]
-            else:
-                return None
+            return None
 
         placement = win32gui.GetWindowPlacement(hwnd)
         # placement[1] == 2 means minimized, 1 means normal
@@ -41,6 +56,22 @@ def toggle_window(appname: str) -> str | None:
         print(f"Error in toggle_window_win32: {e}")
         return None
 
+def window_state(appname: str) -> str:
+    """Returns "minimized", "foreground" or "background" for the app window"""
+    try:
+        hwnd = find_window(appname)
+        if not hwnd:
+            # Nothing to throttle against yet, so treat it as in use
+            return "foreground"
+        if win32gui.IsIconic(hwnd):
+            return "minimized"
+        if win32gui.GetForegroundWindow() == hwnd:
+            return "foreground"
+        return "background"
+    except Exception as e:
+        print(f"Error in window_state: {e}")
+        return "foreground"
+
 def screen_width() -> int:
     """Get screen width"""
     return win32api.GetSystemMetrics(win32con.SM_CXSCREEN)
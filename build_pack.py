@@ -0,0 +1,36 @@
+"""Build an offline thesaurus pack"""
+import argparse
+import os
+import bucket.backend as bb
+
+def main() -> None:
+    """Main func"""
+    parser = argparse.ArgumentParser(description="Build an offline thesaurus pack for Quick Thesaurus")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--cache", help="cache export to build the pack from, e.g. cache.json")
+    source.add_argument("--wordlist", help="file with one word per line, looked up on Merriam-Webster")
+    parser.add_argument("--output", default="thesaurus.pack", help="pack file to write")
+    args = parser.parse_args()
+
+    source_file = args.cache or args.wordlist
+    if not os.path.exists(source_file):
+        print(f"Couldn't find {source_file}")
+        return
+
+    try:
+        if args.cache:
+            count = bb.build_pack(bb.entries_from_cache(args.cache), args.output)
+        else:
+            with open(args.wordlist, "r", encoding="UTF-8") as file:
+                count = bb.build_pack(bb.entries_from_wordlist(file, bb.NetworkBackend()), args.output)
+    except PermissionError as e:
+        print(f"Couldn't replace {args.output}, close Quick Thesaurus and try again ({e})")
+        return
+    except OSError as e:
+        print(f"Failed to build {args.output}: {e}")
+        return
+
+    print(f"Wrote {count} words to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 """Merriam-Webster Thesaurus Parser"""
+import codecs
 import urllib.parse, urllib.request, urllib.error
+from html.parser import HTMLParser
+from typing import Iterator
 from bs4 import BeautifulSoup
 
+URL = "https://www.merriam-webster.com/thesaurus/{}"
+# Seconds to wait on the connection or a read, so a stalled socket can't hang a lookup
+TIMEOUT = 10
+
 class SynAnt:
     """Thesaurus"""
     def __init__(self, word: str) -> None:
@@ -16,11 +23,9 @@ class SynAnt:
 
     def _get_html(self, word: str) -> str | None:
         """Get the html from Merriam-Webster"""
-        safe_word = urllib.parse.quote_plus(word)
-        url = f"https://www.merriam-webster.com/thesaurus/{safe_word}"
         # If the webpage isn't valid it isn't a word
         try:
-            with urllib.request.urlopen(url) as page:
+            with urllib.request.urlopen(word_url(word), timeout=TIMEOUT) as page:
                 html_bytes = page.read()
             return html_bytes.decode("utf-8")
         except urllib.error.URLError:
@@ -42,33 +47,122 @@ class SynAnt:
 
         # Each subdefinition is located within .sense-content
         for result in self._htmlparser.select("div[class*='sense-content']"):
-                        # Extract the "as in" word, this loop should only ever run once
-            asin = ""
-            for asinwords in result.select("div[class*='as-in-word'] > em"):
-                asin = asinwords.get_text(strip=True)
-            self._thesaurus[asin] = {}
-
-            # Get the definition related to the "as in" word
-            for definition in result.select("span[class*='dt']"):
-                definition = definition.get_text("*spl;",strip=True)
-                try:
-                    definition = definition.split("*spl;")[0]
-                except IndexError:
-                    pass
-                self._thesaurus[asin]["def"] = definition
-
-            # Get all synonyms for this "as in" definition
-            synonyms = []
-            for symgroup in result.select("span[class*='sim-list-scored']"):
-                for sym in symgroup.select("span[class='syl']"):
-                    sym = sym.get_text(strip=True)
-                    synonyms.append(sym)
-            self._thesaurus[asin]["syn"] = synonyms
-
-            # Get all antonyms for this "as in" definition
-            antonyms = []
-            for antgroup in result.select("span[class*='opp-list-scored']"):
-                for ant in antgroup.select("span[class='syl']"):
-                    ant = ant.get_text(strip=True)
-                    antonyms.append(ant)
-            self._thesaurus[asin]["ant"] = antonyms
+            asin, sense = extract_sense(result)
+            # Keep the first sense for a repeated "as in" word, the same as streaming does
+            if asin not in self._thesaurus:
+                self._thesaurus[asin] = sense
+
+    @staticmethod
+    def stream(word: str, chunk_size: int = 16384) -> Iterator[tuple[str, dict]]:
+        """Yields each ("as in" word, sense) pair as soon as its block has downloaded"""
+        splitter = _SenseSplitter()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            with urllib.request.urlopen(word_url(word), timeout=TIMEOUT) as page:
+                while chunk := page.read(chunk_size):
+                    splitter.feed(decoder.decode(chunk))
+                    yield from splitter.pop_senses()
+                    if splitter.suggestion:
+                        return
+                splitter.feed(decoder.decode(b"", final=True))
+                splitter.close()
+                yield from splitter.pop_senses()
+        except urllib.error.URLError:
+            return
+
+def word_url(word: str) -> str:
+    """Returns the Merriam-Webster thesaurus url for a word"""
+    return URL.format(urllib.parse.quote_plus(word))
+
+def extract_sense(result) -> tuple[str, dict]:
+    """Extract the "as in" word and its definition, synonyms and antonyms from a .sense-content block"""
+    # Extract the "as in" word, this loop should only ever run once
+    asin = ""
+    for asinwords in result.select("div[class*='as-in-word'] > em"):
+        asin = asinwords.get_text(strip=True)
+    sense = {}
+
+    # Get the definition related to the "as in" word
+    for definition in result.select("span[class*='dt']"):
+        definition = definition.get_text("*spl;",strip=True)
+        try:
+            definition = definition.split("*spl;")[0]
+        except IndexError:
+            pass
+        sense["def"] = definition
+
+    # Get all synonyms for this "as in" definition
+    synonyms = []
+    for symgroup in result.select("span[class*='sim-list-scored']"):
+        for sym in symgroup.select("span[class='syl']"):
+            sym = sym.get_text(strip=True)
+            synonyms.append(sym)
+    sense["syn"] = synonyms
+
+    # Get all antonyms for this "as in" definition
+    antonyms = []
+    for antgroup in result.select("span[class*='opp-list-scored']"):
+        for ant in antgroup.select("span[class='syl']"):
+            ant = ant.get_text(strip=True)
+            antonyms.append(ant)
+    sense["ant"] = antonyms
+
+    return asin, sense
+
+class _SenseSplitter(HTMLParser):
+    """Incrementally cuts .sense-content blocks out of a page as it is fed"""
+    def __init__(self) -> None:
+        # Keep character references as-is so the block can be rebuilt verbatim
+        super().__init__(convert_charrefs=False)
+        self.suggestion = False
+        self._block: list[str] | None = None
+        self._depth = 0
+        self._senses: list[tuple[str, dict]] = []
+
+    def pop_senses(self) -> list[tuple[str, dict]]:
+        """Returns the senses completed since the last call"""
+        if self.suggestion:
+            # A spelling suggestion means the word wasn't found, so nothing on the page is a result
+            self._senses = []
+        senses, self._senses = self._senses, []
+        return senses
+
+    def handle_starttag(self, tag, attrs) -> None:
+        classes = dict(attrs).get("class") or ""
+        if "spelling-suggestion-text" in classes:
+            self.suggestion = True
+
+        if self._block is not None:
+            self._block.append(self.get_starttag_text())
+            if tag == "div":
+                self._depth += 1
+        elif tag == "div" and "sense-content" in classes:
+            self._block = [self.get_starttag_text()]
+            self._depth = 1
+
+    def handle_startendtag(self, tag, attrs) -> None:
+        if self._block is not None:
+            self._block.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag) -> None:
+        if self._block is None:
+            return
+        self._block.append(f"</{tag}>")
+        if tag == "div":
+            self._depth -= 1
+            if self._depth == 0:
+                soup = BeautifulSoup("".join(self._block), "html.parser")
+                self._senses.append(extract_sense(soup))
+                self._block = None
+
+    def handle_data(self, data) -> None:
+        if self._block is not None:
+            self._block.append(data)
+
+    def handle_entityref(self, name) -> None:
+        if self._block is not None:
+            self._block.append(f"&{name};")
+
+    def handle_charref(self, name) -> None:
+        if self._block is not None:
+            self._block.append(f"&#{name};")
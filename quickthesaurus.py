@@ -1,8 +1,10 @@
 """Quick Thesaurus"""
-import threading, time, keyboard
+import threading, keyboard
+from typing import Iterator
 from spellchecker import SpellChecker
 import dearpygui.dearpygui as dpg
-from mw_parser import SynAnt
+from bucket.backend import Backend
+import bucket.backend as bb
 from bucket.cache import Cache
 from bucket.config import Config
 import bucket.helper as bh
@@ -13,35 +15,57 @@ class Global:
     """Global Variables"""
     spell: SpellChecker = SpellChecker(distance=2)
     config: Config = Config()
-    cache: Cache = Cache()
+    cache: Cache = Cache(shared=config.get("shared_cache"), compress=config.get("compress_cache"))
+    backends: list[Backend] = bb.from_config(config.get("backends"), config.get("pack_file"))
 
     appname: str = "Quick Thesaurus"
     version: str = "0.1.0"
 
     toggle_event = threading.Event()
     kill_event = threading.Event()
+    # Set whenever the render loop has something to do, so it can sleep while idle
+    wake_event = threading.Event()
 
-def get_word_data(word: str) -> dict:
-    """Attempts to get the word data from the cache, otherwise pull it from Merriam-Webster"""
+    # Seconds between frames while the window isn't focused, or is minimized
+    background_interval: float = 0.1
+    minimized_interval: float = 0.5
+
+def stream_word_data(word: str) -> Iterator[tuple[str, dict]]:
+    """Yields each sense of the word from the cache, otherwise from each backend in order as it arrives"""
     try:
         # Check cache first
         thesaurus = Global.cache.get(word)
         if thesaurus is not None:
-            return thesaurus
-
-        # Fetch from Merriam-Webster
-        dpg.set_value("status_txt", "Waiting on Merriam-Webster...")
-        word_data: SynAnt = SynAnt(word)
-        thesaurus = word_data.get_thesaurus()
-
-        if thesaurus:
-            # Only cache successful results
-            Global.cache.save(word, thesaurus)
-            return thesaurus
-        return {}
+            for key, sense in thesaurus.items():
+                # Ignore the cache validity key
+                if key != "__valid":
+                    yield key, sense
+            return
+
+        for backend in Global.backends:
+            if backend.remote:
+                dpg.set_value("status_txt", "Waiting on Merriam-Webster...")
+            thesaurus = {}
+            try:
+                for key, sense in backend.stream(word):
+                    if key not in thesaurus:
+                        thesaurus[key] = sense
+                        yield key, sense
+            except Exception as e:
+                print(f"Error fetching word data from {backend.name}: {e}")
+                # A broken backend shouldn't stop the next one from being tried,
+                # unless it already showed part of a result, which also shouldn't be cached
+                if thesaurus:
+                    return
+                continue
+
+            if thesaurus:
+                # Only cache successful results that were slow to get
+                if backend.remote:
+                    Global.cache.save(word, thesaurus)
+                return
     except Exception as e:
         print(f"Error fetching word data: {e}")
-        return {}
 
 def autocorrect_callback(_sender, _app_data, user_data) -> None:
     """Tab to autocorrect to first result"""
@@ -94,54 +118,51 @@ def search_callback() -> None:
             dpg.set_value("status_txt", f"Did you mean: {suggestion_text}?")
             return
 
-    # If word data is none, then it isn't a real word
-    word_data = get_word_data(word)
-    if not word_data:
+    # Render each sense as soon as it arrives, if none arrive then it isn't a real word
+    counter = 0
+    for key, sense in stream_word_data(word):
+        counter += 1
+        add_sense(counter, key, sense)
+
+    if counter == 0:
         dpg.set_value("status_txt", f"No results found for '{word}'.")
         return
 
-    # Generate thesaurus
-    counter = 1
-    for key in word_data:
-        # Ignore the cache validity key
-        if key == "__valid":
-            continue
-
-        dpg.add_text(f"{counter}. as in {key}", parent="output", tag=f"scroll_{key}")
-        if 'def' in word_data[key]:
-            dpg.add_text(word_data[key]['def'], parent="output", wrap=450, indent=27)
-
-        column_count = Global.config.get("column_count")
-
-        syn_length = len(word_data[key]['syn'])
-        if (Global.config.get("show_synonyms") and syn_length > 0):
-            dpg.add_text("Synonyms:", parent="output",color=Color.GREEN)
-            with dpg.table(header_row=False,parent="output", indent=27):
-                bh.add_columns(column_count)
-                for i in range(syn_length//column_count):
-                    with dpg.table_row():
-                        for j in range(column_count):
-                            dpg.add_button(label=word_data[key]['syn'][i*column_count+j],
-                                            callback=word_button_callback)
-        
-        ant_length = len(word_data[key]['ant'])
-        if (Global.config.get("show_antonyms") and ant_length > 0):
-            dpg.add_text("Antonyms:", parent="output",color=Color.RED)
-            with dpg.table(header_row=False,parent="output", indent=27):
-                bh.add_columns(column_count)
-                for i in range(ant_length//column_count):
-                    with dpg.table_row():
-                        for j in range(column_count):
-                            dpg.add_button(label=word_data[key]['ant'][i*column_count+j],
-                                            callback=word_button_callback)
-
-        dpg.add_spacer(parent="output")
-        dpg.add_separator(parent="output")
-
-        counter += 1
-
     dpg.set_value("status_txt", "")
 
+def add_sense(counter: int, key: str, sense: dict) -> None:
+    """Append a single sense of the thesaurus to the output"""
+    dpg.add_text(f"{counter}. as in {key}", parent="output", tag=f"scroll_{key}")
+    if 'def' in sense:
+        dpg.add_text(sense['def'], parent="output", wrap=450, indent=27)
+
+    column_count = Global.config.get("column_count")
+
+    syn_length = len(sense['syn'])
+    if (Global.config.get("show_synonyms") and syn_length > 0):
+        dpg.add_text("Synonyms:", parent="output",color=Color.GREEN)
+        with dpg.table(header_row=False,parent="output", indent=27):
+            bh.add_columns(column_count)
+            for i in range(syn_length//column_count):
+                with dpg.table_row():
+                    for j in range(column_count):
+                        dpg.add_button(label=sense['syn'][i*column_count+j],
+                                        callback=word_button_callback)
+
+    ant_length = len(sense['ant'])
+    if (Global.config.get("show_antonyms") and ant_length > 0):
+        dpg.add_text("Antonyms:", parent="output",color=Color.RED)
+        with dpg.table(header_row=False,parent="output", indent=27):
+            bh.add_columns(column_count)
+            for i in range(ant_length//column_count):
+                with dpg.table_row():
+                    for j in range(column_count):
+                        dpg.add_button(label=sense['ant'][i*column_count+j],
+                                        callback=word_button_callback)
+
+    dpg.add_spacer(parent="output")
+    dpg.add_separator(parent="output")
+
 def window_toggle() -> None:
     """Toggles the window state between focused and minimized"""
     action = w32.toggle_window(Global.appname)
@@ -153,33 +174,30 @@ def window_toggle() -> None:
         except Exception as e:
             print(e)
 
-def hotkey_listener() -> None:
-    """Listens for the hotkey to toggle the window state"""
-    while not Global.kill_event.is_set():
-        keyboard.wait("ctrl+alt+a")
-        window_toggle()
-        # Debouncing to prevent repeated openings/closings
-        # Wait until the a key is released (so you can hold ctrl+alt and tap a)
-        while keyboard.is_pressed("a"):
-            time.sleep(0.05)
-
-        time.sleep(0.05)
+def request_toggle() -> None:
+    """Hotkey callback, asks the render loop to toggle the window state"""
+    Global.toggle_event.set()
+    Global.wake_event.set()
 
-def poll_toggle() -> None:
-    """Each frame, check and see if there is a key press, if so, toggle window state"""
-    dpg.set_frame_callback(dpg.get_frame_count() + 1, poll_toggle)
-
-    if Global.kill_event.is_set():
-        return
-
-    try:
+def render_loop() -> None:
+    """Render frames, throttling while the window is in the background and nearly stopping while minimized"""
+    while dpg.is_dearpygui_running() and not Global.kill_event.is_set():
         if Global.toggle_event.is_set():
-            window_toggle()
             Global.toggle_event.clear()
-    except Exception as e:
-        print(f"Error in poll_toggle: {e}")
-        # If there's an error, clear the event to prevent getting stuck
-        Global.toggle_event.clear()
+            try:
+                window_toggle()
+            except Exception as e:
+                print(f"Error in render_loop: {e}")
+
+        dpg.render_dearpygui_frame()
+
+        # Vsync paces the foreground, otherwise sleep until the next frame is due or something wakes us
+        match w32.window_state(Global.appname):
+            case "minimized":
+                Global.wake_event.wait(Global.minimized_interval)
+            case "background":
+                Global.wake_event.wait(Global.background_interval)
+        Global.wake_event.clear()
 
 def move_window() -> None:
     """Move and resize window"""
@@ -211,36 +229,71 @@ def sconfig_callback(sender, _app_data, user_data: str) -> None:
             width, height = dpg.get_value("width_input"), dpg.get_value("height_input")
             horizontal_offset = dpg.get_value("horizontal_offset_input")
             vertical_offset = dpg.get_value("vertical_offset_input")
-            Global.config.save("alignment", alignment)
-            Global.config.save("window_size", [width, height])
+            Global.config.save("alignment", alignment, save_to_disk=False)
+            Global.config.save("window_size", [width, height], save_to_disk=False)
             Global.config.save("offset", [horizontal_offset, vertical_offset])
             move_window()
+            dpg.configure_item("settings", width=width, height=height)
         case "reset":
             Global.config.set_default()
             move_window()
+            update_config_widgets()
         case "column_count":
             count = int(dpg.get_value(sender))
             Global.config.save("column_count", count)
         case "cache_purge":
             Global.cache.purge()
+            update_cache_stats()
         case "cache_trim":
             Global.cache.purge(invalid_only=True)
+            update_cache_stats()
         case "cache_validate":
             Global.cache.revalidate_all()
+            update_cache_stats()
         case _:
             raise NotImplementedError(f"Unknown option, {user_data}")
 
-    dpg.delete_item("settings")
-    settings_modal()
-
 def reset_settings_callback() -> None:
     """Reset settings on Ctrl+Shift+R"""
     if dpg.is_key_down(dpg.mvKey_ModCtrl) and dpg.is_key_down(dpg.mvKey_ModShift):
         Global.config.set_default()
         move_window()
+        update_config_widgets()
+
+def update_config_widgets() -> None:
+    """Show the current config in the settings modal, if it is open"""
+    if not dpg.does_item_exist("settings"):
+        return
+    dpg.configure_item("settings", width=Global.config.get("window_size")[0],
+                       height=Global.config.get("window_size")[1])
+    dpg.set_value("align_radio", "Align Right" if Global.config.get("alignment") == "right" else "Align Left")
+    dpg.set_value("width_input", Global.config.get("window_size")[0])
+    dpg.set_value("height_input", Global.config.get("window_size")[1])
+    dpg.set_value("horizontal_offset_input", Global.config.get("offset")[0])
+    dpg.set_value("vertical_offset_input", Global.config.get("offset")[1])
+    dpg.set_value("close_on_copy_check", Global.config.get("close_on_copy"))
+    dpg.set_value("show_synonyms_check", Global.config.get("show_synonyms"))
+    dpg.set_value("show_antonyms_check", Global.config.get("show_antonyms"))
+    dpg.set_value("column_count", str(Global.config.get("column_count")))
+
+def update_cache_stats() -> None:
+    """Show the current cache statistics in the settings modal, if it is open"""
+    if not dpg.does_item_exist("settings"):
+        return
+    dpg.set_value("cache_size_txt", f"Cache Size: {Global.cache.size()}")
+    total, invalid = Global.cache.count()
+    if total == 0:
+        percent_invalid = 0.0
+    else:
+        percent_invalid = round((invalid / total) * 100, 1)
+    dpg.set_value("cache_count_txt", f"Cache Entries: {total} (Total) | {invalid} [{percent_invalid}%] (Invalid)")
 
 def settings_modal() -> None:
     """Settings modal"""
+    if dpg.does_item_exist("settings"):
+        dpg.focus_item("settings")
+        return
+
     with dpg.window(label="Settings", no_move=True, no_resize=False,
                     no_collapse=True, tag="settings",
                     width=Global.config.get("window_size")[0],
@@ -264,15 +317,15 @@ def settings_modal() -> None:
         dpg.add_button(label="Resize", callback=sconfig_callback, user_data="save_window")
 
         dpg.add_checkbox(label="Close on Copy", default_value=Global.config.get("close_on_copy"),
-                         callback=sconfig_callback, user_data="close_on_copy")
+                         tag="close_on_copy_check", callback=sconfig_callback, user_data="close_on_copy")
 
         dpg.add_spacer(height=3)
 
         dpg.add_text("Display Settings:")
         dpg.add_checkbox(label="Show Synonyms", default_value=Global.config.get("show_synonyms"),
-                         callback=sconfig_callback, user_data="show_synonyms")
+                         tag="show_synonyms_check", callback=sconfig_callback, user_data="show_synonyms")
         dpg.add_checkbox(label="Show Antonyms", default_value=Global.config.get("show_antonyms"),
-                         callback=sconfig_callback, user_data="show_antonyms")
+                         tag="show_antonyms_check", callback=sconfig_callback, user_data="show_antonyms")
         with dpg.group(horizontal=True):
             dpg.add_text("Columns:")
             dpg.add_radio_button(["1", "2", "3"], default_value=Global.config.get("column_count"),
@@ -286,13 +339,9 @@ def settings_modal() -> None:
         dpg.add_separator()
 
         # Cache #
-        dpg.add_text(f"Cache Size: {Global.cache.size()}")
-        total, invalid = Global.cache.count()
-        if total == 0:
-            percent_invalid = 0.0
-        else:
-            percent_invalid = round((invalid / total) * 100, 1)
-        dpg.add_text(f"Cache Entries: {total} (Total) | {invalid} [{percent_invalid}%] (Invalid)")
+        dpg.add_text(tag="cache_size_txt")
+        dpg.add_text(tag="cache_count_txt")
+        update_cache_stats()
         with dpg.group(horizontal=True):
             dpg.add_button(label="Purge Cache", callback=sconfig_callback, user_data="cache_purge")
             dpg.add_button(label="Trim Invalid Cache", callback=sconfig_callback, user_data="cache_trim")
@@ -315,8 +364,8 @@ def auto_search(word: str) -> None:
     dpg.set_value("input_word", word)
     search_callback()
 
-def main() -> None:
-    """Main func"""
+def setup() -> None:
+    """Create the context, viewport and main window"""
     dpg.create_context()
 
     bh.load_font("assets/NotoSerifCJKjp-Medium.otf", 24, set_default=True)
@@ -352,8 +401,8 @@ def main() -> None:
     with dpg.handler_registry():
         dpg.add_key_press_handler(dpg.mvKey_R,callback=reset_settings_callback,tag="reset_settings")
 
-    # Start a thread to listen to the hotkey
-    threading.Thread(target=hotkey_listener, daemon=True).start()
+    # Ctrl+Alt+A fires once on release, so holding ctrl+alt and tapping a works
+    keyboard.add_hotkey("ctrl+alt+a", request_toggle, trigger_on_release=True)
     dpg.setup_dearpygui()
     dpg.set_primary_window("main_window", True)
     dpg.show_viewport()
@@ -361,18 +410,23 @@ def main() -> None:
 
     dpg.focus_item("input_word")
 
-    # Start the main thread polling to listen for the hotkey
-    poll_toggle()
-    dpg.start_dearpygui()
+def main() -> None:
+    """Main func"""
+    setup()
+    render_loop()
 
     dpg.destroy_context()
     exit_handler()
 
 def exit_handler() -> None:
     """Cleanup on quit"""
-    # This might not be strictly necessary, since the keyboard listener is a daemon thread,
-    # But this should still fire for the keyboard poll event loop
+    # Stop the render loop, waking it in case it is asleep while minimized
     Global.kill_event.set()
+    Global.wake_event.set()
+    keyboard.unhook_all_hotkeys()
+    Global.config.flush()
+    for backend in Global.backends:
+        backend.close()
     dpg.destroy_context()
 
 if __name__ == "__main__":